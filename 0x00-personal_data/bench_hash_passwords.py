@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark of hash_passwords and verify_many throughput per worker count
+
+Usage: python3 bench_hash_passwords.py [passwords] [rounds]
+"""
+import os
+import sys
+import time
+
+# The pool workers inherit the cost factor through the environment
+if len(sys.argv) > 2:
+    os.environ["BCRYPT_ROUNDS"] = sys.argv[2]
+os.environ.setdefault("BCRYPT_ROUNDS", "8")
+
+encrypt_password = __import__('encrypt_password')
+
+
+def main():
+    """
+    Times hash_passwords and verify_many for 1, 2, 4... workers up to the
+    CPU count, against hash_password in a loop.
+    """
+    cpus = os.cpu_count() or 1
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else (
+        4 * encrypt_password.BATCH_SIZE * cpus)
+    passwords = [f"password-{i}" for i in range(count)]
+
+    workers = [1]
+    while workers[-1] * 2 <= cpus:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cpus:
+        workers.append(cpus)
+
+    print("{} passwords, cost factor {}, {} CPUs".format(
+        count, encrypt_password.ROUNDS, cpus))
+
+    start = time.perf_counter()
+    hashed = [encrypt_password.hash_password(password)
+              for password in passwords]
+    serial = time.perf_counter() - start
+    print("{:>8} {:>12} {:>12} {:>8}".format(
+        "workers", "hash/s", "verify/s", "speedup"))
+    print("{:>8} {:>12.1f} {:>12} {:>8}".format(
+        "serial", count / serial, "-", "1.0x"))
+
+    for worker_count in workers:
+        start = time.perf_counter()
+        hashed = encrypt_password.hash_passwords(passwords,
+                                                 workers=worker_count)
+        hash_time = time.perf_counter() - start
+        start = time.perf_counter()
+        valid = encrypt_password.verify_many(zip(hashed, passwords),
+                                             workers=worker_count)
+        verify_time = time.perf_counter() - start
+        assert all(valid)
+        print("{:>8} {:>12.1f} {:>12.1f} {:>7.1f}x".format(
+            worker_count, count / hash_time, count / verify_time,
+            serial / hash_time))
+
+
+# The pool workers import this script too when they are spawned
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,33 @@ Encrypt Password Module
 """
 
 import bcrypt
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from os import environ
+from typing import Iterable, List, Optional, Tuple, Union
 
+# Number of passwords sent to a worker process at a time
+BATCH_SIZE = 16
 
-def hash_password(password: str) -> bytes:
+# bcrypt cost factor (log2 of the number of rounds) used for new hashes,
+# within the 4..31 range bcrypt accepts
+try:
+    ROUNDS = int(environ.get("BCRYPT_ROUNDS", 12))
+except ValueError:
+    ROUNDS = None
+if ROUNDS is None or not 4 <= ROUNDS <= 31:
+    warnings.warn("BCRYPT_ROUNDS must be an integer from 4 to 31, using 12")
+    ROUNDS = 12
+
+
+def hash_password(password: str, rounds: int = ROUNDS) -> bytes:
     """
     Hashes the input password using bcrypt.
 
     Args:
         password: A string representing the password to be hashed.
+        rounds: The bcrypt cost factor, defaults to ROUNDS.
 
     Returns:
         bytes: A salted, hashed password.
@@ -20,7 +39,7 @@ def hash_password(password: str) -> bytes:
     password_bytes = password.encode()
 
     # Generate a salt and hash the password
-    hashed_password = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+    hashed_password = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds))
 
     return hashed_password
 
@@ -42,3 +61,103 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
 
     # Check if the password matches the hashed password
     return bcrypt.checkpw(password_bytes, hashed_password)
+
+
+def needs_rehash(hashed_password: Union[bytes, str],
+                 rounds: int = ROUNDS) -> bool:
+    """
+    Tells whether a hashed password uses a cost factor other than rounds.
+
+    Call it after a successful is_valid to rehash the password with the
+    current cost factor.
+
+    Args:
+        hashed_password: A bcrypt hash such as b"$2b$12$...".
+        rounds: The expected bcrypt cost factor, defaults to ROUNDS.
+
+    Returns:
+        bool: True if the hash should be recomputed, False otherwise.
+    """
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode()
+    try:
+        return int(hashed_password.split("$")[2]) != rounds
+    except (IndexError, ValueError):
+        return True
+
+
+def calibrate_rounds(target_seconds: float, min_rounds: int = 4,
+                     max_rounds: int = 31) -> int:
+    """
+    Finds the highest bcrypt cost factor hashing within a target latency
+    on the current machine.
+
+    Args:
+        target_seconds: The longest acceptable time to hash one password.
+        min_rounds: The lowest cost factor to try and return.
+        max_rounds: The highest cost factor to try.
+
+    Returns:
+        int: The highest cost factor whose hash time is within the target,
+             or min_rounds if none is.
+    """
+    best = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds))
+        if time.perf_counter() - start > target_seconds:
+            break
+        best = rounds
+    return best
+
+
+def _is_valid_pair(pair: Tuple[bytes, str]) -> bool:
+    """
+    Validates a (hashed_password, password) pair in a worker process.
+
+    Args:
+        pair: A tuple of a hashed password and the password to validate.
+
+    Returns:
+        bool: True if the password matches the hashed password,
+              False otherwise.
+    """
+    return is_valid(*pair)
+
+
+def hash_passwords(passwords: Iterable[str], workers: Optional[int] = None,
+                   batch_size: int = BATCH_SIZE) -> List[bytes]:
+    """
+    Hashes many passwords in parallel using a pool of processes.
+
+    Args:
+        passwords: An iterable of strings representing the passwords.
+        workers: The number of worker processes, defaults to the CPU count.
+        batch_size: The number of passwords sent to a worker at a time.
+
+    Returns:
+        List[bytes]: The salted, hashed passwords, in input order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_password, passwords,
+                                 chunksize=batch_size))
+
+
+def verify_many(pairs: Iterable[Tuple[bytes, str]],
+                workers: Optional[int] = None,
+                batch_size: int = BATCH_SIZE) -> List[bool]:
+    """
+    Validates many passwords in parallel using a pool of processes.
+
+    Args:
+        pairs: An iterable of (hashed_password, password) tuples.
+        workers: The number of worker processes, defaults to the CPU count.
+        batch_size: The number of pairs sent to a worker at a time.
+
+    Returns:
+        List[bool]: Whether each password matches its hashed password,
+                    in input order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_is_valid_pair, pairs,
+                                 chunksize=batch_size))
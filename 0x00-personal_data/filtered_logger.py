@@ -3,13 +3,59 @@
 Filtered Logger Module
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import re
-from typing import List
+from functools import lru_cache
+from typing import Callable, Iterator, List, Match, Pattern, Tuple
 from os import environ
 import mysql.connector
 
 
+@lru_cache(maxsize=128)
+def _redaction_pattern(fields: Tuple[str, ...], separator: str) -> Pattern:
+    """
+    Builds the combined pattern matching every field in a single scan.
+
+    Args:
+        fields: A tuple of strings representing all fields to obfuscate.
+        separator: A string representing the field separator.
+
+    Returns:
+        Pattern: A compiled regex capturing the field name in group 1.
+    """
+    alternatives = "|".join(fields) or "(?!)"
+    return re.compile(f'({alternatives})=(.*?){separator}')
+
+
+@lru_cache(maxsize=128)
+def _redaction_replacer(fields: Tuple[str, ...], redaction: str,
+                        separator: str) -> Callable[[Match], str]:
+    """
+    Builds the replacement function of a combined pattern.
+
+    The redacted text of each field is built once, which is cheaper than
+    expanding a group reference template on every match.
+
+    Args:
+        fields: A tuple of strings representing all fields to obfuscate.
+        redaction: A string representing by what the field will be obfuscated.
+        separator: A string representing the field separator.
+
+    Returns:
+        Callable: A function returning the redacted text of a match.
+    """
+    replacements = {field: f'{field}={redaction}{separator}'
+                    for field in fields}
+
+    def replace(match: Match) -> str:
+        field = match.group(1)
+        return replacements.get(field) or f'{field}={redaction}{separator}'
+    return replace
+
+
 def filter_datum(fields: List[str], redaction: str, message: str,
                  separator: str) -> str:
     """
@@ -24,10 +70,10 @@ def filter_datum(fields: List[str], redaction: str, message: str,
     Returns:
         str: A string with specified fields obfuscated
     """
-    for field in fields:
-        message = re.sub(f'{field}=(.*?){separator}',
-                         f'{field}={redaction}{separator}', message)
-    return message
+    fields = tuple(fields)
+    pattern = _redaction_pattern(fields, separator)
+    return pattern.sub(_redaction_replacer(fields, redaction, separator),
+                       message)
 
 
 class RedactingFormatter(logging.Formatter):
@@ -48,25 +94,158 @@ class RedactingFormatter(logging.Formatter):
 
         Formats the log record by redacting specified fields.
 
+        Records logged with `extra={"redacted": True}` are already redacted
+        and are formatted as is.
+
         Args:
             record: The LogRecord to be formatted.
 
         Returns:
             str: The formatted log record.
         """
-        record.msg = filter_datum(self.fields, self.REDACTION, record.msg,
-                                  self.SEPARATOR)
+        if not getattr(record, "redacted", False):
+            record.msg = filter_datum(self.fields, self.REDACTION, record.msg,
+                                      self.SEPARATOR)
         return super().format(record)
 
 
+class BatchStreamHandler(logging.StreamHandler):
+    """ Stream handler writing buffered records with a single write
+    """
+
+    def __init__(self, capacity: int, flush_level: int = logging.ERROR,
+                 stream=None):
+        """
+        Initializes the handler.
+
+        Args:
+            capacity: The number of records buffered before they are written.
+            flush_level: Records at or above this level are written at once,
+                         together with the buffered ones.
+            stream: The stream to write to, defaults to sys.stderr.
+        """
+        super(BatchStreamHandler, self).__init__(stream)
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self.buffer = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Formats a record and buffers the line.
+
+        Args:
+            record: The LogRecord to be written.
+        """
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if (len(self.buffer) >= self.capacity or
+                record.levelno >= self.flush_level):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes all buffered lines to the stream in one call, then flushes it.
+        """
+        self.acquire()
+        try:
+            if self.buffer and self.stream is not None:
+                self.stream.write(self.terminator.join(self.buffer) +
+                                  self.terminator)
+                self.buffer = []
+            super(BatchStreamHandler, self).flush()
+        finally:
+            self.release()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """ Queue handler applying an overflow policy when the queue is full
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop", "count")
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "block"):
+        """
+        Initializes the handler.
+
+        Args:
+            log_queue: The bounded queue read by the listener.
+            overflow: What to do when the queue is full, one of
+                      OVERFLOW_POLICIES.
+
+        Raises:
+            ValueError: If overflow is not a known policy.
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+        self.listener = None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Puts a record on the queue according to the overflow policy.
+
+        Args:
+            record: The LogRecord to be enqueued.
+        """
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "count":
+                self.dropped += 1
+
+
+class RedactingQueueListener(logging.handlers.QueueListener):
+    """ Queue listener redacting and writing records on a background thread
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """
+        Waits for room on a bounded queue so that every record queued
+        before shutdown is still written.
+        """
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        """
+        Drains the queue and stops the background thread, once.
+        """
+        if self._thread is not None:
+            super(RedactingQueueListener, self).stop()
+
+
 # Define the fields from user_data.csv that are considered PII
 PII_FIELDS = ("name", "email", "phone", "ssn", "password")
 
+# Number of rows fetched from the database and log records written at once
+BATCH_SIZE = 1000
+
+# Maximum number of records waiting for the background logging thread
+QUEUE_SIZE = 10000
 
-def get_logger() -> logging.Logger:
+
+def get_logger(batch_size: int = 0, asynchronous: bool = False,
+               queue_size: int = QUEUE_SIZE,
+               overflow: str = "block") -> logging.Logger:
     """
     Configures and returns a logger object.
 
+    Args:
+        batch_size: When greater than 0, records are buffered and written
+                    to the stream with one write per batch of this size.
+        asynchronous: When True, records are handed to a bounded queue and
+                      redacted and written by a background thread.
+        queue_size: The maximum number of records waiting in the queue.
+        overflow: What to do when the queue is full: "block" the caller,
+                  "drop" the record, or drop it and "count" it.
+
     Returns:
         Logger: A configured logger object.
     """
@@ -79,21 +258,81 @@ def get_logger() -> logging.Logger:
     # Prevent messages from being propagated to other loggers
     logger.propagate = False
 
-    # Create a StreamHandler to log to the console
-    stream_handler = logging.StreamHandler()
+    # Replace the handlers of a previous call instead of adding to them
+    _close_handlers(logger)
+
+    # Create a StreamHandler to log to the console, writing batch_size
+    # lines at a time when batching
+    if batch_size > 0:
+        handler = BatchStreamHandler(batch_size)
+    else:
+        handler = logging.StreamHandler()
 
     # Create a RedactingFormatter with PII_FIELDS
     formatter = RedactingFormatter(PII_FIELDS)
 
     # Set the formatter for the StreamHandler
-    stream_handler.setFormatter(formatter)
+    handler.setFormatter(formatter)
+
+    # Move formatting and I/O to a background thread when asynchronous
+    if asynchronous:
+        queue_handler = BoundedQueueHandler(queue.Queue(queue_size), overflow)
+        queue_handler.listener = RedactingQueueListener(queue_handler.queue,
+                                                        handler)
+        queue_handler.listener.start()
+        handler = queue_handler
 
-    # Add the StreamHandler to the logger
-    logger.addHandler(stream_handler)
+    # Add the handler to the logger
+    logger.addHandler(handler)
 
     return logger
 
 
+def stop_logger(logger: logging.Logger) -> None:
+    """
+    Writes out every pending record of a logger and removes its handlers.
+
+    Records logged afterwards are dropped until get_logger is called again.
+
+    Args:
+        logger: A logger configured by get_logger.
+    """
+    _close_handlers(logger)
+    # Drop later records instead of printing them unredacted through
+    # logging.lastResort
+    logger.addHandler(logging.NullHandler())
+
+
+def _close_handlers(logger: logging.Logger) -> None:
+    """
+    Stops the background thread of asynchronous handlers once the queue is
+    drained, then flushes, removes and closes all handlers of a logger.
+
+    Args:
+        logger: A logger configured by get_logger.
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        listener = getattr(handler, "listener", None)
+        if listener is not None:
+            listener.stop()
+            for target in listener.handlers:
+                target.flush()
+                target.close()
+        handler.flush()
+        handler.close()
+
+
+def _stop_user_data_logger() -> None:
+    """
+    Writes out the pending records of the user_data logger at exit.
+    """
+    stop_logger(logging.getLogger("user_data"))
+
+
+atexit.register(_stop_user_data_logger)
+
+
 def get_db() -> mysql.connector.connection.MySQLConnection:
     """Returns a connector to the database."""
 
@@ -113,36 +352,78 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     return db
 
 
-def main() -> None:
-    """Main function to retrieve and log filtered user data."""
+def fetch_rows(cursor, batch_size: int = BATCH_SIZE) -> Iterator[tuple]:
+    """
+    Streams the rows of an executed query.
+
+    Args:
+        cursor: A DB-API cursor on which a query has been executed.
+        batch_size: The number of rows to fetch per round trip.
+
+    Returns:
+        Iterator[tuple]: The result rows, one at a time.
+    """
+    rows = cursor.fetchmany(batch_size)
+    while rows:
+        yield from rows
+        rows = cursor.fetchmany(batch_size)
+
+
+def redact_rows(cursor, batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    """
+    Streams the rows of an executed query as filtered log messages.
+
+    Args:
+        cursor: A DB-API cursor on which a query has been executed.
+        batch_size: The number of rows to fetch per round trip.
+
+    Returns:
+        Iterator[str]: One `key=value;` log message per row.
+    """
+    # cursor.description is available on any DB-API cursor
+    columns = [column[0] for column in cursor.description]
+    # Look up the PII column positions once for the whole result set
+    pii_positions = {index for index, field in enumerate(columns)
+                     if field in PII_FIELDS}
+    redaction = RedactingFormatter.REDACTION
+    for row in fetch_rows(cursor, batch_size):
+        log_message = "; ".join([
+            f"{field}={redaction if index in pii_positions else value}"
+            for index, (field, value) in enumerate(zip(columns, row))
+        ])
+        log_message += ";"  # Append a semicolon at the end
+        yield log_message
+
+
+def main(batch_size: int = BATCH_SIZE) -> None:
+    """
+    Main function to retrieve and log filtered user data.
+
+    Rows are streamed from the database and written to the log in batches,
+    so memory use does not depend on the size of the users table.
+
+    Args:
+        batch_size: The number of rows fetched and logged at once.
+    """
     # Get a logger
-    logger = get_logger()
+    logger = get_logger(batch_size)
 
     # Get a database connection
     db = get_db()
 
-    # Create a cursor to execute queries
+    # Create an unbuffered cursor so rows stay on the server until fetched
     cursor = db.cursor()
 
     # Execute a query to retrieve all rows from the users table
     cursor.execute("SELECT * FROM users")
 
-    # Fetch all rows
-    rows = cursor.fetchall()
-
     # Log each row in a filtered format
-    for row in rows:
-        filtered_row = {}
-        for field, value in zip(cursor.column_names, row):
-            if field in PII_FIELDS:
-                filtered_row[field] = "***"
-            else:
-                filtered_row[field] = value
-        # Convert the filtered_row dictionary to a formatted string
-        log_message = ("; ".join([f"{key}={value}" for key,
-                       value in filtered_row.items()]))
-        log_message += ";"  # Append a semicolon at the end
-        logger.info(log_message)
+    # Rows are redacted by column, so the formatter can skip its own pass
+    for log_message in redact_rows(cursor, batch_size):
+        logger.info(log_message, extra={"redacted": True})
+
+    # Write out the last partial batch
+    stop_logger(logger)
 
     # Close the cursor and database connection
     cursor.close()
@@ -3,8 +3,76 @@
 Auth module
 """
 
+import re
+from functools import lru_cache
 from flask import request
-from typing import List, TypeVar
+from typing import List, Tuple, TypeVar
+
+
+class ExcludedPaths:
+    """
+    Excluded paths compiled once for require_auth.
+
+    Paths ending with '*' are joined into a single prefix regex, the others
+    are normalized with a trailing slash and kept in a set.
+    """
+
+    def __init__(self, excluded_paths: List[str]):
+        """
+        Compiles a list of excluded paths.
+
+        Args:
+            excluded_paths (List[str]): A list of paths that
+                                        do not require authentication.
+        """
+        self.size = len(excluded_paths)
+        self.exact = set()
+        prefixes = []
+        for excluded_path in excluded_paths:
+            if len(excluded_path) == 0:
+                continue
+
+            if excluded_path[-1] != '*':
+                if excluded_path[-1] != '/':
+                    excluded_path += '/'
+                self.exact.add(excluded_path)
+            else:
+                prefixes.append(re.escape(excluded_path[:-1]))
+
+        self.prefix = None
+        if len(prefixes) > 0:
+            self.prefix = re.compile('|'.join(prefixes))
+
+    def __len__(self) -> int:
+        """
+        Returns the number of excluded paths given, so that an empty
+        ExcludedPaths requires authentication everywhere like an empty list.
+        """
+        return self.size
+
+    def match(self, path: str) -> bool:
+        """
+        Checks a path, already ending with a slash, against the
+        excluded paths.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if the path is excluded, False otherwise.
+        """
+        if path in self.exact:
+            return True
+
+        return self.prefix is not None and self.prefix.match(path) is not None
+
+
+@lru_cache(maxsize=32)
+def _compile_excluded_paths(excluded_paths: Tuple[str, ...]) -> ExcludedPaths:
+    """
+    Returns the compiled form of a tuple of excluded paths.
+    """
+    return ExcludedPaths(excluded_paths)
 
 
 class Auth:
@@ -19,7 +87,8 @@ class Auth:
         Args:
             path (str): The path to check.
             excluded_paths (List[str]): A list of paths that
-                                        do not require authentication.
+                                        do not require authentication,
+                                        or an ExcludedPaths compiled once.
 
         Returns:
             bool: False for now, indicating no path requires authentication.
@@ -35,25 +104,10 @@ class Auth:
         if path[-1] != '/':
             path += '/'
 
-        for excluded_path in excluded_paths:
-            if len(excluded_path) == 0:
-                continue
-
-            # Normalize excluded_path to always have a
-            # trailing slash if not ending with '*'
-            if excluded_path[-1] != '*':
-                if excluded_path[-1] != '/':
-                    excluded_path += '/'
-
-                if path == excluded_path:
-                    return False
-
-            else:
-                # Handle wildcard matching
-                if path.startswith(excluded_path[:-1]):
-                    return False
+        if not isinstance(excluded_paths, ExcludedPaths):
+            excluded_paths = _compile_excluded_paths(tuple(excluded_paths))
 
-        return True
+        return not excluded_paths.match(path)
 
     def authorization_header(self, request=None) -> str:
         """
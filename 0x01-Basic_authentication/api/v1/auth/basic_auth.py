@@ -4,6 +4,12 @@ BasicAuth module
 """
 
 import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
 from typing import TypeVar
 from api.v1.auth.auth import Auth
 from models.user import User
@@ -14,6 +20,81 @@ class BasicAuth(Auth):
     BasicAuth class for basic authentication.
     """
 
+    # Number of verified Authorization headers kept, and for how many
+    # seconds each one is trusted without checking the password again
+    CACHE_SIZE = 1024
+    CACHE_TTL = 300
+
+    def __init__(self):
+        """
+        Constructor method.
+
+        Sets up the cache of verified Authorization headers. Headers are
+        stored as HMAC digests under a random per-process key, never as
+        plaintext credentials.
+        """
+        super().__init__()
+        self._cache_key = os.urandom(32)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _header_digest(self, authorization_header: str) -> bytes:
+        """
+        Returns the keyed digest of an Authorization header.
+
+        Args:
+            authorization_header (str): The Authorization header.
+
+        Returns:
+            bytes: The HMAC-SHA256 digest, or None if invalid.
+        """
+        if not isinstance(authorization_header, str):
+            return None
+
+        return hmac.new(self._cache_key, authorization_header.encode(),
+                        hashlib.sha256).digest()
+
+    def _cached_user(self, digest: bytes) -> TypeVar('User'):
+        """
+        Returns the User verified earlier for a header digest.
+
+        The entry is dropped when it is too old, or when the user was
+        removed or changed email or password since.
+
+        Args:
+            digest (bytes): The digest of the Authorization header.
+
+        Returns:
+            User: The User instance if still valid, else None.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(digest)
+            if entry is None:
+                return None
+            user_id, email, password, expires_at = entry
+            user = User.get(user_id)
+            if (expires_at < time.monotonic() or user is None
+                    or user.email != email or user.password != password):
+                del self._cache[digest]
+                return None
+            self._cache.move_to_end(digest)
+            return user
+
+    def _cache_user(self, digest: bytes, user: TypeVar('User')) -> None:
+        """
+        Remembers the User verified for a header digest.
+
+        Args:
+            digest (bytes): The digest of the Authorization header.
+            user (User): The verified User instance.
+        """
+        with self._cache_lock:
+            self._cache[digest] = (user.id, user.email, user.password,
+                                   time.monotonic() + self.CACHE_TTL)
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
     def extract_base64_authorization_header(self,
                                             authorization_header: str) -> str:
         """
@@ -127,6 +208,12 @@ class BasicAuth(Auth):
         if bauth is None:
             return None
 
+        # A header verified recently maps straight to its user
+        digest = self._header_digest(auth_header)
+        user = self._cached_user(digest)
+        if user is not None:
+            return user
+
         dauth = self.decode_base64_authorization_header(bauth)
         if dauth is None:
             return None
@@ -135,4 +222,7 @@ class BasicAuth(Auth):
         if email is None or pwd is None:
             return None
 
-        return self.user_object_from_credentials(email, pwd)
+        user = self.user_object_from_credentials(email, pwd)
+        if user is not None:
+            self._cache_user(digest, user)
+        return user
@@ -9,14 +9,20 @@ class User(Base):
     """ User class
     """
 
+    __slots__ = ('email', '_password', 'first_name', 'last_name')
+
+    indexed_attributes = ('email',)
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """
         super().__init__(*args, **kwargs)
-        self.email = kwargs.get('email')
-        self._password = kwargs.get('_password')
-        self.first_name = kwargs.get('first_name')
-        self.last_name = kwargs.get('last_name')
+        # Set without __setattr__, as in Base.__init__
+        set_slot = object.__setattr__
+        set_slot(self, 'email', kwargs.get('email'))
+        set_slot(self, '_password', kwargs.get('_password'))
+        set_slot(self, 'first_name', kwargs.get('first_name'))
+        set_slot(self, 'last_name', kwargs.get('last_name'))
 
     @property
     def password(self) -> str:
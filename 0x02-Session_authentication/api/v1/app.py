@@ -6,6 +6,7 @@ from os import getenv
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
+from api.v1.auth.auth import ExcludedPaths
 import os
 
 
@@ -14,6 +15,12 @@ app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 auth = None
 auth_type = getenv('AUTH_TYPE')
+excluded_paths = ExcludedPaths([
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/'
+])
 
 
 if auth_type == 'basic_auth':
@@ -31,6 +38,7 @@ elif auth_type == 'session_db_auth':
 else:
     from api.v1.auth.auth import Auth
     auth = Auth()
+app.config['AUTH'] = auth
 
 
 @app.errorhandler(404)
@@ -72,12 +80,6 @@ def before_request_handler() -> str:
     if auth is None:
         return
 
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/',
-        '/api/v1/auth_session/login/'
-    ]
     if not auth.require_auth(request.path, excluded_paths):
         return
 
@@ -85,9 +87,7 @@ def before_request_handler() -> str:
             and auth.session_cookie(request) is None):
         abort(401)
 
-    request.current_user = auth.current_user(request)
-
-    if auth.current_user(request) is None:
+    if auth.resolve_user(request) is None:
         abort(403)
 
 
@@ -103,7 +103,8 @@ class SessionAuth(Auth):
         if user_id is None:
             return False
 
-        # Delete the session ID from the dictionary
-        del self.user_id_by_session_id[session_id]
+        # Delete the session ID from the dictionary, unless it was
+        # evicted in the meantime
+        self.user_id_by_session_id.pop(session_id, None)
 
         return True
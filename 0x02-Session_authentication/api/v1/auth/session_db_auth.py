@@ -41,6 +41,9 @@ class SessionDBAuth(SessionExpAuth):
         Returns the User ID associated with the session ID
         by querying the database.
 
+        The session file is only read again when it changed on disk, and
+        the session is looked up through the session_id index.
+
         Args:
             session_id (str): The session ID.
 
@@ -51,7 +54,7 @@ class SessionDBAuth(SessionExpAuth):
         if session_id is None:
             return None
 
-        UserSession.load_from_file()
+        UserSession.reload_if_changed()
 
         session_ids = UserSession.search({'session_id': session_id})
         if not session_ids:
@@ -92,7 +95,6 @@ class SessionDBAuth(SessionExpAuth):
 
         try:
             session_ids[0].remove()
-            UserSession.save_to_file()
         except Exception:
             return False
 
@@ -6,6 +6,7 @@ Session expiration chscker module
 import os
 from datetime import datetime, timedelta
 from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_store import SessionStore
 
 
 class SessionExpAuth(SessionAuth):
@@ -21,6 +22,9 @@ class SessionExpAuth(SessionAuth):
         environment variable SESSION_DURATION, casting it to an integer.
         If the environment variable doesn’t exist or can’t be parsed
         to an integer, assigns 0 to session_duration.
+
+        Sessions are kept in a SessionStore that evicts them once expired
+        and holds at most SESSION_MAX_SIZE of them (no limit if unset).
         """
         super().__init__()
         session_duration_str = os.getenv('SESSION_DURATION')
@@ -29,6 +33,14 @@ class SessionExpAuth(SessionAuth):
         except (TypeError, ValueError):
             self.session_duration = 0
 
+        try:
+            session_max_size = int(os.getenv('SESSION_MAX_SIZE'))
+        except (TypeError, ValueError):
+            session_max_size = 0
+
+        self.user_id_by_session_id = SessionStore(self.session_duration,
+                                                  session_max_size)
+
     def create_session(self, user_id=None):
         """
         Creates a Session ID by calling super().
@@ -70,10 +82,12 @@ class SessionExpAuth(SessionAuth):
             str: The User ID associated with the session ID,
                  or None if session_id is None, not found, or expired.
         """
-        if session_id is None or session_id not in self.user_id_by_session_id:
+        if session_id is None:
             return None
 
-        session_dict = self.user_id_by_session_id[session_id]
+        session_dict = self.user_id_by_session_id.get(session_id)
+        if session_dict is None:
+            return None
 
         user_id = session_dict.get('user_id')
         created_at = session_dict.get('created_at')
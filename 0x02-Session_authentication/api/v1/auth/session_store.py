@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Session store module
+"""
+
+import heapq
+import threading
+import time
+from itertools import count
+
+
+class SessionStore:
+    """
+    In-memory session store with O(1) lookup and expiry.
+
+    Sessions expire ttl seconds after they are stored. A heap ordered by
+    expiry time lets expired sessions be evicted a few at a time on every
+    access, and lets sweep() evict all of them at once, which is done
+    every sweep_every stores.
+    """
+
+    def __init__(self, ttl: int = 0, max_size: int = 0,
+                 sweep_every: int = 1000):
+        """
+        Constructor method.
+
+        Args:
+            ttl (int): Lifetime of a session in seconds, 0 or less for
+                       sessions that never expire.
+            max_size (int): Maximum number of live sessions, 0 or less for
+                            no limit. When full, the session closest to
+                            expiry is evicted.
+            sweep_every (int): Number of stores between two sweeps, 0 or
+                               less for no periodic sweep.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.sweep_every = sweep_every
+        self.evicted = 0
+        self._stores = 0
+        self._sessions = {}
+        self._expiries = []
+        self._sequence = count()
+        self._lock = threading.Lock()
+
+    @property
+    def live(self) -> int:
+        """
+        Returns the number of sessions currently stored.
+        """
+        return len(self._sessions)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of sessions currently stored.
+        """
+        return self.live
+
+    def __repr__(self) -> str:
+        """
+        Returns the stored values by session ID, like a dictionary.
+        """
+        return repr({session_id: entry[0]
+                     for session_id, entry in self._sessions.items()})
+
+    def __contains__(self, session_id) -> bool:
+        """
+        Tells whether a session is stored and not expired.
+        """
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id):
+        """
+        Returns the value stored for a session.
+
+        Raises:
+            KeyError: If the session is missing or expired.
+        """
+        value = self.get(session_id)
+        if value is None:
+            raise KeyError(session_id)
+        return value
+
+    def __setitem__(self, session_id, value) -> None:
+        """
+        Stores a session, evicting expired sessions and, when the store
+        is full, the sessions closest to expiry.
+        """
+        with self._lock:
+            self._stores += 1
+            if 0 < self.sweep_every and self._stores % self.sweep_every == 0:
+                self._evict_expired(time.monotonic(), limit=None)
+            else:
+                self._evict_expired(time.monotonic())
+            expires_at = float('inf')
+            if self.ttl > 0:
+                expires_at = time.monotonic() + self.ttl
+            sequence = next(self._sequence)
+            self._sessions[session_id] = (value, expires_at, sequence)
+            heapq.heappush(self._expiries, (expires_at, sequence, session_id))
+            while 0 < self.max_size < len(self._sessions):
+                self._evict_first()
+            self._compact()
+
+    def __delitem__(self, session_id) -> None:
+        """
+        Deletes a session.
+
+        Raises:
+            KeyError: If the session is missing, e.g. already evicted.
+        """
+        with self._lock:
+            del self._sessions[session_id]
+            self._compact()
+
+    def pop(self, session_id, default=None):
+        """
+        Deletes a session if it is still stored.
+
+        Args:
+            session_id (str): The session ID to delete.
+            default: The value to return for a missing or expired session.
+
+        Returns:
+            The value stored for the session, or default.
+        """
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            self._compact()
+            if entry is None or entry[1] <= time.monotonic():
+                return default
+            return entry[0]
+
+    def get(self, session_id, default=None):
+        """
+        Returns the value stored for a session.
+
+        Args:
+            session_id (str): The session ID to look up.
+            default: The value to return for a missing or expired session.
+
+        Returns:
+            The stored value, or default.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[1] <= now:
+                return default
+            return entry[0]
+
+    def sweep(self) -> int:
+        """
+        Evicts every expired session.
+
+        Returns:
+            int: The number of sessions evicted.
+        """
+        with self._lock:
+            evicted = self.evicted
+            self._evict_expired(time.monotonic(), limit=None)
+            return self.evicted - evicted
+
+    def _is_current(self, heap_entry: tuple) -> bool:
+        """
+        Tells whether a heap entry still matches a stored session.
+        """
+        entry = self._sessions.get(heap_entry[2])
+        return entry is not None and entry[2] == heap_entry[1]
+
+    def _evict_first(self) -> None:
+        """
+        Evicts the stored session closest to expiry.
+        """
+        while self._expiries:
+            heap_entry = heapq.heappop(self._expiries)
+            if self._is_current(heap_entry):
+                del self._sessions[heap_entry[2]]
+                self.evicted += 1
+                return
+
+    def _evict_expired(self, now: float, limit: int = 8) -> None:
+        """
+        Evicts up to limit expired sessions, or all of them if limit
+        is None.
+        """
+        while self._expiries and self._expiries[0][0] <= now:
+            if limit is not None:
+                if limit == 0:
+                    return
+                limit -= 1
+            heap_entry = heapq.heappop(self._expiries)
+            if self._is_current(heap_entry):
+                del self._sessions[heap_entry[2]]
+                self.evicted += 1
+
+    def _compact(self) -> None:
+        """
+        Drops heap entries left behind by replaced or deleted sessions.
+        """
+        if len(self._expiries) > 2 * len(self._sessions) + 64:
+            self._expiries = [heap_entry for heap_entry in self._expiries
+                              if self._is_current(heap_entry)]
+            heapq.heapify(self._expiries)
@@ -19,10 +19,17 @@ def stats() -> str:
     """ GET /api/v1/stats
     Return:
       - the number of each objects
+      - the number of live and evicted sessions, with session_exp_auth
     """
+    from flask import current_app
+    from api.v1.auth.session_store import SessionStore
     from models.user import User
     stats = {}
     stats['users'] = User.count()
+    store = getattr(current_app.config.get('AUTH'),
+                    'user_id_by_session_id', None)
+    if isinstance(store, SessionStore):
+        stats['sessions'] = {'live': store.live, 'evicted': store.evicted}
     return jsonify(stats)
 
 
@@ -2,20 +2,75 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import Response, abort, json, jsonify, request
+from models.base import FILE_LOCK
 from models.user import User
+from typing import Iterator
+
+PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - limit (optional): number of User objects per page, up to
+        MAX_PAGE_LIMIT
+      - after (optional): ID of the last User of the previous page
+      - fields (optional): comma-separated list of attributes to return
+      - stream (optional): if set, the list is sent as chunked JSON,
+        one User at a time
     Return:
       - list of all User objects JSON represented
+      - if limit or after is given, one page of User objects ordered by ID
+        as {"data": [...], "next": <ID to pass as after, or null>}
+      - 400 if limit is not a positive integer
     """
-    all_users = [user.to_json() for user in User.all()]
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = fields.split(',')
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    if limit is not None or after is not None:
+        try:
+            limit = int(limit) if limit is not None else PAGE_LIMIT
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return jsonify({'error': "Wrong limit"}), 400
+        limit = min(limit, MAX_PAGE_LIMIT)
+        users = User.page(after, limit)
+        next_id = users[-1].id if len(users) == limit else None
+        return jsonify({'data': [_project(user.to_json(), fields)
+                                 for user in users],
+                        'next': next_id})
+    if request.args.get('stream'):
+        return Response(_stream_users(User.all(), fields),
+                        mimetype='application/json')
+    all_users = [_project(user.to_json(), fields) for user in User.all()]
     return jsonify(all_users)
 
 
+def _project(user_json: dict, fields: list = None) -> dict:
+    """ Keep only the requested fields of a User JSON dictionary
+    """
+    if fields is None:
+        return user_json
+    return {k: v for k, v in user_json.items() if k in fields}
+
+
+def _stream_users(users, fields: list = None) -> Iterator[str]:
+    """ Generate the JSON list of users chunk by chunk
+    """
+    yield '['
+    for i, user in enumerate(users):
+        if i > 0:
+            yield ','
+        yield json.dumps(_project(user.to_json(), fields))
+    yield ']'
+
+
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
 def view_one_user(user_id: str = None) -> str:
     """ GET /api/v1/users/:id
@@ -139,3 +194,93 @@ def update_user(user_id: str = None) -> str:
         user.last_name = rj.get('last_name')
     user.save()
     return jsonify(user.to_json()), 200
+
+
+@app_views.route('/users/bulk', methods=['POST'], strict_slashes=False)
+def bulk_users() -> str:
+    """ POST /api/v1/users/bulk
+    JSON body:
+      - list of operations, each one a JSON object with:
+        - op: "create", "update" or "delete"
+        - id: User ID (update and delete)
+        - email, password (create)
+        - last_name, first_name (optional, create and update)
+    Return:
+      - list of results in the order of the operations, each one with
+        the status code of the matching single-user request and either
+        the User object JSON represented or an error
+      - 400 if the body is not a list of operations
+    All the changes are written to file once, at the end.
+    """
+    rj = None
+    try:
+        rj = request.get_json()
+    except Exception as e:
+        rj = None
+    if not isinstance(rj, list):
+        return jsonify({'error': "Wrong format"}), 400
+
+    results = []
+    changed = False
+    # A load between the changes and their write would drop them
+    with FILE_LOCK:
+        for item in rj:
+            if not isinstance(item, dict):
+                result = ({'error': "Wrong format"}, 400)
+            elif item.get('op') == 'create':
+                result = _bulk_create(item)
+            elif item.get('op') == 'update':
+                result = _bulk_update(item)
+            elif item.get('op') == 'delete':
+                result = _bulk_delete(item)
+            else:
+                result = ({'error': "Wrong operation"}, 400)
+            changed = changed or result[1] < 400
+            results.append(dict(result[0], status=result[1]))
+
+        if changed:
+            User.save_to_file()
+    return jsonify(results), 200
+
+
+def _bulk_create(item: dict) -> tuple:
+    """ Create one User of a bulk request, without writing to file
+    """
+    if item.get("email", "") == "":
+        return {'error': "email missing"}, 400
+    if item.get("password", "") == "":
+        return {'error': "password missing"}, 400
+    try:
+        user = User()
+        user.email = item.get("email")
+        user.password = item.get("password")
+        user.first_name = item.get("first_name")
+        user.last_name = item.get("last_name")
+        user.save(persist=False)
+        return user.to_json(), 201
+    except Exception as e:
+        return {'error': "Can't create User: {}".format(e)}, 400
+
+
+def _bulk_update(item: dict) -> tuple:
+    """ Update one User of a bulk request, without writing to file
+    """
+    user = User.get(item.get('id'))
+    if user is None:
+        return {'error': "Not found"}, 404
+    if item.get('first_name') is not None:
+        user.first_name = item.get('first_name')
+    if item.get('last_name') is not None:
+        user.last_name = item.get('last_name')
+    user.save(persist=False)
+    return user.to_json(), 200
+
+
+def _bulk_delete(item: dict) -> tuple:
+    """ Delete one User of a bulk request, without writing to file
+    """
+    user = User.get(item.get('id'))
+    if user is None:
+        return {'error': "Not found"}, 404
+    user.remove(persist=False)
+    return {'id': user.id}, 200
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+""" Benchmark of the memory used per User and UserSession object
+
+Compares the __slots__ models with the same attributes stored in a
+per-instance __dict__, as the models did before, right after creation
+and after a save_to_file has serialized every object.
+
+Usage: python3 bench_memory.py [objects]
+Nothing is written to the .db_ files.
+"""
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+from models.user import User
+from models.user_session import UserSession
+
+
+class DictObject():
+    """ Object keeping its attributes in a __dict__
+    """
+
+    def __init__(self, **kwargs):
+        """ Initialize a DictObject
+        """
+        self.__dict__.update(kwargs)
+
+
+def user_kwargs(i: int) -> dict:
+    """ Attributes of the i-th User
+    """
+    return {'email': "user{}@hbtn.io".format(i),
+            '_password': uuid.uuid4().hex + uuid.uuid4().hex,
+            'first_name': "First{}".format(i),
+            'last_name': "Last{}".format(i)}
+
+
+def session_kwargs(i: int) -> dict:
+    """ Attributes of the i-th UserSession
+    """
+    return {'user_id': str(uuid.uuid4()), 'session_id': str(uuid.uuid4())}
+
+
+def measure(build, count: int) -> tuple:
+    """ Return the bytes per object after building count objects, and
+    after calling to_json(True) on each of them like save_to_file
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objs = [build(i) for i in range(count)]
+    created = tracemalloc.get_traced_memory()[0]
+    if hasattr(objs[0], 'to_json'):
+        for obj in objs:
+            obj.to_json(True)
+    serialized = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (created - start) / count, (serialized - start) / count
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+print("{:>12} {:>10} {:>12} {:>14}".format(
+    "class", "__dict__", "__slots__", "after save"))
+for cls, kwargs in ((User, user_kwargs), (UserSession, session_kwargs)):
+    def build_dict(i):
+        return DictObject(id=str(uuid.uuid4()), created_at=datetime.utcnow(),
+                          updated_at=datetime.utcnow(), **kwargs(i))
+
+    def build_slots(i):
+        return cls(**kwargs(i))
+
+    dict_size = measure(build_dict, count)[0]
+    slots_size, saved_size = measure(build_slots, count)
+    print("{:>12} {:>10.0f} {:>12.0f} {:>14.0f}".format(
+        cls.__name__, dict_size, slots_size, saved_size))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+""" Benchmark of require_auth with hundreds of excluded paths
+
+Compares the former loop over the excluded paths with require_auth on
+a plain list (compiled once per distinct list) and on an ExcludedPaths
+compiled once, like app.py does.
+
+Usage: python3 bench_require_auth.py [calls]
+"""
+import sys
+import timeit
+from typing import List
+from api.v1.auth.auth import Auth, ExcludedPaths
+
+
+def former_require_auth(path: str, excluded_paths: List[str]) -> bool:
+    """ require_auth as it was, checking each excluded path in turn
+    """
+    if path is None or excluded_paths is None or len(excluded_paths) == 0:
+        return True
+    if len(path) == 0:
+        return True
+    if path[-1] != '/':
+        path += '/'
+    for excluded_path in excluded_paths:
+        if len(excluded_path) == 0:
+            continue
+        if excluded_path[-1] != '*':
+            if excluded_path[-1] != '/':
+                excluded_path += '/'
+            if path == excluded_path:
+                return False
+        else:
+            if path.startswith(excluded_path[:-1]):
+                return False
+    return True
+
+
+number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+auth = Auth()
+
+print("{:>9} {:>10} {:>12} {:>10} {:>14} {:>8}".format(
+    "patterns", "path", "former (us)", "list (us)", "compiled (us)",
+    "speedup"))
+for size in (10, 100, 500, 1000):
+    excluded = []
+    for i in range(size // 2):
+        excluded.append("/api/v1/public/{}".format(i))
+        excluded.append("/api/v1/static/{}/*".format(i))
+    compiled = ExcludedPaths(excluded)
+    paths = (("miss", "/api/v1/users/me"),
+             ("last", "/api/v1/public/{}/".format(size // 2 - 1)),
+             ("prefix", "/api/v1/static/{}/a.css".format(size // 2 - 1)))
+    for name, path in paths:
+        former = former_require_auth(path, excluded)
+        assert auth.require_auth(path, excluded) == former
+        assert auth.require_auth(path, compiled) == former
+        times = [min(timeit.repeat(lambda: check(path, paths_arg),
+                                   number=number, repeat=3)) / number
+                 for check, paths_arg in (
+                     (former_require_auth, excluded),
+                     (auth.require_auth, excluded),
+                     (auth.require_auth, compiled))]
+        print("{:>9} {:>10} {:>12.2f} {:>10.2f} {:>14.2f} {:>7.0f}x".format(
+            size, name, times[0] * 1e6, times[1] * 1e6, times[2] * 1e6,
+            times[0] / times[2]))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+""" Benchmark of the indexed User.search against a full scan
+
+Usage: python3 bench_search.py [users ...]
+Nothing is written to the .db_ files.
+"""
+import sys
+import timeit
+from models.base import DATA
+from models.user import User
+
+
+sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+
+print("{:>8} {:>12} {:>12} {:>9}".format(
+    "users", "scan (us)", "index (us)", "speedup"))
+for size in sizes:
+    DATA['User'] = {}
+    for i in range(size):
+        user = User(email="user{}@hbtn.io".format(i))
+        DATA['User'][user.id] = user
+    User.reindex()
+    email = "user{}@hbtn.io".format(size // 2)
+
+    def scan():
+        return [user for user in DATA['User'].values()
+                if user.email == email]
+
+    def indexed():
+        return User.search({'email': email})
+
+    assert scan() == indexed()
+    number = max(1, 100000 // size)
+    scan_time = min(timeit.repeat(scan, number=number, repeat=3)) / number
+    index_time = min(timeit.repeat(indexed, number=1000, repeat=3)) / 1000
+    print("{:>8} {:>12.1f} {:>12.1f} {:>8.0f}x".format(
+        size, scan_time * 1e6, index_time * 1e6, scan_time / index_time))
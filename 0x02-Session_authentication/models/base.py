@@ -1,21 +1,202 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 from typing import TypeVar, List, Iterable
-from os import path
+from os import getenv, getpid, path, remove, replace, stat
+import atexit
 import json
+import logging
+import threading
+import time
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+JOURNAL_SIZES = {}
+FIELDS = {}
+FILE_STATS = {}
+SORTED_IDS = {}
+
+# LOCK guards DATA and the in-memory indexes. FILE_LOCK guards the .db_
+# files of this process, and is held by save and remove from their change
+# of DATA to its persist, so that a load never swaps out a change that is
+# not on file yet. Locks are taken in the order WRITER.write_lock,
+# FILE_LOCK, LOCK
+LOCK = threading.RLock()
+FILE_LOCK = threading.RLock()
+
+# "file" rewrites .db_<Class>.json on every change, "journal" appends one
+# record per change to .db_<Class>.journal and compacts it into the
+# .db_<Class>.json snapshot every JOURNAL_COMPACT_THRESHOLD records
+STORAGE_MODE = getenv('MODEL_STORAGE', 'file')
+try:
+    JOURNAL_COMPACT_THRESHOLD = int(getenv('MODEL_JOURNAL_COMPACT', '1000'))
+except ValueError:
+    JOURNAL_COMPACT_THRESHOLD = 1000
+
+# Keep loaded records as raw JSON dictionaries in DATA and only build the
+# objects on their first get or search hit
+LAZY_LOAD = getenv('MODEL_LAZY_LOAD', '0') == '1'
+
+# In "file" mode, when MODEL_FLUSH_INTERVAL is greater than 0, changes only
+# mark their class dirty and a background thread writes each dirty class
+# at most once every MODEL_FLUSH_INTERVAL seconds, or as soon as
+# MODEL_FLUSH_BATCH changes are pending
+try:
+    FLUSH_INTERVAL = float(getenv('MODEL_FLUSH_INTERVAL', '0'))
+except ValueError:
+    FLUSH_INTERVAL = 0
+try:
+    FLUSH_BATCH = int(getenv('MODEL_FLUSH_BATCH', '100'))
+except ValueError:
+    FLUSH_BATCH = 100
+
+
+def format_datetime(value: datetime) -> str:
+    """ Format a datetime with TIMESTAMP_FORMAT, through the faster
+    isoformat when both give the same string
+    """
+    if value.tzinfo is None and value.year >= 1000:
+        return value.isoformat(timespec='seconds')
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class GroupCommitWriter():
+    """ Background writer grouping the file writes of many changes
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        """ Initialize a GroupCommitWriter, its thread starts on first use
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self.dirty = {}
+        self.condition = threading.Condition()
+        # Held while writing, and by loads so that no change is marked
+        # dirty between their flush and their swap of DATA
+        self.write_lock = threading.RLock()
+        self.thread = None
+
+    def mark_dirty(self, cls):
+        """ Record one pending change of a class, and start the thread if
+        it is not running
+        """
+        with self.condition:
+            self.dirty[cls] = self.dirty.get(cls, 0) + 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            if self.dirty[cls] >= self.batch_size:
+                self.condition.notify()
+
+    def run(self):
+        """ Write the dirty classes every interval, or when a batch is full
+        """
+        while True:
+            with self.condition:
+                if all(n < self.batch_size for n in self.dirty.values()):
+                    self.condition.wait(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # The failed classes are dirty again: retry them after
+                # an interval rather than right away
+                logging.getLogger(__name__).exception(
+                    "Failed to write pending model changes")
+                time.sleep(self.interval)
+
+    def flush(self, cls=None):
+        """ Write the dirty classes (or only cls) and return once they are
+        on disk, including a write already in progress
+
+        A class whose write fails stays dirty, and the first error is
+        raised once the other classes are written.
+        """
+        with self.write_lock:
+            with self.condition:
+                if cls is None:
+                    pending = self.dirty
+                    self.dirty = {}
+                elif cls in self.dirty:
+                    pending = {cls: self.dirty.pop(cls)}
+                else:
+                    pending = {}
+            error = None
+            for klass, count in pending.items():
+                try:
+                    klass.save_to_file()
+                except Exception as e:
+                    with self.condition:
+                        self.dirty[klass] = self.dirty.get(klass, 0) + count
+                    error = error or e
+            if error is not None:
+                raise error
+
+
+WRITER = GroupCommitWriter(FLUSH_INTERVAL, FLUSH_BATCH)
+atexit.register(WRITER.flush)
+
+
+def flush():
+    """ Write every pending change to file, for shutdown and tests
+    """
+    WRITER.flush()
+
+
+class Index():
+    """ Hash index from the value of one attribute to object IDs
+    """
+
+    def __init__(self, attribute: str):
+        """ Initialize an empty Index
+        """
+        self.attribute = attribute
+        self.ids_by_value = {}
+        self.value_by_id = {}
+
+    def add(self, obj_id: str, value) -> None:
+        """ Index (or re-index) an object ID under a value
+        """
+        self.discard(obj_id)
+        try:
+            self.ids_by_value.setdefault(value, {})[obj_id] = None
+        except TypeError:
+            return
+        self.value_by_id[obj_id] = value
+
+    def discard(self, obj_id: str) -> None:
+        """ Remove an object ID from the index
+        """
+        if obj_id not in self.value_by_id:
+            return
+        value = self.value_by_id.pop(obj_id)
+        ids = self.ids_by_value[value]
+        del ids[obj_id]
+        if len(ids) == 0:
+            del self.ids_by_value[value]
+
+    def lookup(self, value) -> List[str]:
+        """ Return the IDs of objects indexed under a value
+        """
+        return list(self.ids_by_value.get(value, ()))
 
 
 class Base():
     """ Base class
     """
 
+    # Attributes are stored in slots instead of a per-instance __dict__;
+    # subclasses list their own attributes in __slots__ too.
+    # _json_cache holds the to_json() result and is not an attribute
+    __slots__ = ('id', 'created_at', 'updated_at', '_json_cache')
+
+    # Attributes with a hash index used by search
+    indexed_attributes = ()
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
@@ -23,17 +204,34 @@ class Base():
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
 
-        self.id = kwargs.get('id', str(uuid.uuid4()))
+        # A new object has no cached JSON to drop: its slots are set
+        # with object.__setattr__, which skips the call to __setattr__
+        set_slot = object.__setattr__
+        set_slot(self, '_json_cache', None)
+        # Loaded objects have an ID: only generate one for new objects
+        if 'id' in kwargs:
+            set_slot(self, 'id', kwargs['id'])
+        else:
+            set_slot(self, 'id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            set_slot(self, 'created_at',
+                     datetime.strptime(kwargs.get('created_at'),
+                                       TIMESTAMP_FORMAT))
         else:
-            self.created_at = datetime.utcnow()
+            set_slot(self, 'created_at', datetime.utcnow())
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            set_slot(self, 'updated_at',
+                     datetime.strptime(kwargs.get('updated_at'),
+                                       TIMESTAMP_FORMAT))
         else:
-            self.updated_at = datetime.utcnow()
+            set_slot(self, 'updated_at', datetime.utcnow())
+
+    def __setattr__(self, name: str, value):
+        """ Set an attribute and drop the cached JSON of the object
+        """
+        object.__setattr__(self, name, value)
+        if name != '_json_cache':
+            object.__setattr__(self, '_json_cache', None)
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -44,62 +242,338 @@ class Base():
             return False
         return (self.id == other.id)
 
+    @classmethod
+    def fields(cls) -> List[str]:
+        """ Return the slot attribute names of the class, base class first
+        """
+        fields = FIELDS.get(cls)
+        if fields is None:
+            fields = []
+            for klass in reversed(cls.__mro__):
+                for key in klass.__dict__.get('__slots__', ()):
+                    if key not in fields and key not in ('__dict__',
+                                                         '_json_cache'):
+                        fields.append(key)
+            FIELDS[cls] = fields
+        return fields
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
+
+        The result of to_json() is cached until an attribute of the object
+        is set. The for_serialization result is not: save_to_file builds it
+        for every object, and caching it would keep a dictionary per object
+        in memory.
         """
+        if not for_serialization:
+            cache = getattr(self, '_json_cache', None)
+            if cache is not None:
+                return dict(cache)
         result = {}
-        for key, value in self.__dict__.items():
+        for key in self.fields():
+            if not for_serialization and key[0] == '_':
+                continue
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                continue
+            if type(value) is datetime:
+                result[key] = format_datetime(value)
+            else:
+                result[key] = value
+        # Attributes of a subclass without __slots__
+        for key, value in getattr(self, '__dict__', {}).items():
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
+                result[key] = format_datetime(value)
             else:
                 result[key] = value
-        return result
+        if for_serialization:
+            return result
+        self._json_cache = result
+        return dict(result)
 
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from file, then replay the journal
+
+        The objects are loaded aside and swapped in at once, so that
+        concurrent searches never see a partly loaded class. Pending
+        changes of the class are written first, or the swap would lose
+        them.
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        objs = {}
+        with WRITER.write_lock, FILE_LOCK:
+            WRITER.flush(cls)
+            file_stats = cls.file_stats()
+            if path.exists(file_path):
+                with open(file_path, 'r') as f:
+                    objs_json = json.load(f)
+                    for obj_id, obj_json in objs_json.items():
+                        objs[obj_id] = cls.from_json(obj_json)
+            journal_size = cls.replay_journal(objs)
+
+            with LOCK:
+                FILE_STATS[s_class] = file_stats
+                JOURNAL_SIZES[s_class] = journal_size
+                DATA[s_class] = objs
+                cls.reindex()
+
+    @classmethod
+    def file_stats(cls) -> tuple:
+        """ Return the inode, modification time and size of the files
+        of the class, to tell when another process changed them
+        """
+        s_class = cls.__name__
+        stats = []
+        for file_path in (".db_{}.json", ".db_{}.journal"):
+            try:
+                st = stat(file_path.format(s_class))
+                stats.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    @classmethod
+    def reload_if_changed(cls) -> bool:
+        """ Load all objects from file only if the files changed since
+        the last load, or after invalidate()
+        """
+        s_class = cls.__name__
+        # Most calls find the files unchanged: tell so without the locks,
+        # so that they do not wait behind a write of any class
+        if (s_class in DATA and
+                FILE_STATS.get(s_class) == cls.file_stats()):
+            return False
+        # Pending changes would be lost by the reload, and must not be
+        # added between the flush and the load
+        with WRITER.write_lock, FILE_LOCK:
+            WRITER.flush(cls)
+            if (s_class in DATA and
+                    FILE_STATS.get(s_class) == cls.file_stats()):
+                return False
+            cls.load_from_file()
+            return True
+
+    @classmethod
+    def invalidate(cls):
+        """ Force the next reload_if_changed to load from file
+        """
+        FILE_STATS.pop(cls.__name__, None)
+
+    @classmethod
+    def track_own_write(cls, unchanged: bool):
+        """ Record the file stats after a write of this process, so that
+        it does not trigger a reload, unless the files had already been
+        changed by another process before the write
+        """
+        if unchanged:
+            FILE_STATS[cls.__name__] = cls.file_stats()
+
+    @classmethod
+    def replay_journal(cls, objs: dict) -> int:
+        """ Apply the records of the journal file on the loaded objects
+        and return the number of records
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        journal_size = 0
+        if not path.exists(journal_path):
+            return journal_size
+
+        with open(journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Skip a record cut short by a crash while appending
+                    continue
+                if record['op'] == 'save':
+                    objs[record['id']] = cls.from_json(record['obj'])
+                else:
+                    objs.pop(record['id'], None)
+                journal_size += 1
+        return journal_size
+
+    @classmethod
+    def append_to_journal(cls, op: str, obj: TypeVar('Base')):
+        """ Append one save or remove record to the journal file
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        record = {'op': op, 'id': obj.id}
+        if op == 'save':
+            record['obj'] = obj.to_json(True)
+
+        with FILE_LOCK:
+            unchanged = FILE_STATS.get(s_class) == cls.file_stats()
+            with open(journal_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            cls.track_own_write(unchanged)
+            with LOCK:
+                JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + 1
+                compact = JOURNAL_SIZES[s_class] >= JOURNAL_COMPACT_THRESHOLD
+
+        if compact:
+            cls.save_to_file()
+
+    @classmethod
+    def persist(cls, op: str, obj: TypeVar('Base')):
+        """ Persist one change with the configured STORAGE_MODE
+        """
+        if STORAGE_MODE == 'journal':
+            cls.append_to_journal(op, obj)
+        elif FLUSH_INTERVAL > 0:
+            WRITER.mark_dirty(cls)
+        else:
+            cls.save_to_file()
+
+    @classmethod
+    def from_json(cls, obj_json: dict):
+        """ Build an object from its JSON dictionary, or keep the
+        dictionary as is when LAZY_LOAD is set
+        """
+        if LAZY_LOAD:
+            return obj_json
+        return cls(**obj_json)
+
+    @classmethod
+    def hydrate(cls, obj_id: str) -> TypeVar('Base'):
+        """ Return a stored object, building it from its JSON dictionary
+        if it was lazily loaded
+        """
+        s_class = cls.__name__
+        obj = DATA[s_class].get(obj_id)
+        if type(obj) is not dict:
+            return obj
+        with LOCK:
+            obj = DATA[s_class].get(obj_id)
+            if type(obj) is dict:
+                obj = cls(**obj)
+                DATA[s_class][obj_id] = obj
+            return obj
+
+    @classmethod
+    def reindex(cls):
+        """ Rebuild all indexes of the class from the stored objects
+        """
+        s_class = cls.__name__
+        INDEXES[s_class] = {}
+        # The ID ordering used by page is rebuilt on its next call
+        SORTED_IDS.pop(s_class, None)
+        for attribute in cls.indexed_attributes:
+            INDEXES[s_class][attribute] = Index(attribute)
+        for obj_id, obj in DATA.get(s_class, {}).items():
+            for attribute, index in INDEXES[s_class].items():
+                if type(obj) is dict:
+                    index.add(obj_id, obj.get(attribute))
+                else:
+                    index.add(obj_id, getattr(obj, attribute, None))
+
+    def index(self):
+        """ Add current object to the indexes of its class, LOCK held
+        """
+        indexes = INDEXES.get(self.__class__.__name__)
+        if indexes is None:
+            self.__class__.reindex()
             return
+        for attribute, index in indexes.items():
+            index.add(self.id, getattr(self, attribute, None))
+        ids = SORTED_IDS.get(self.__class__.__name__)
+        if ids is not None:
+            i = bisect_left(ids, self.id)
+            if i == len(ids) or ids[i] != self.id:
+                ids.insert(i, self.id)
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    def unindex(self):
+        """ Remove current object from the indexes of its class, LOCK held
+        """
+        for index in INDEXES.get(self.__class__.__name__, {}).values():
+            index.discard(self.id)
+        ids = SORTED_IDS.get(self.__class__.__name__)
+        if ids is not None:
+            i = bisect_left(ids, self.id)
+            if i < len(ids) and ids[i] == self.id:
+                del ids[i]
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
+
+        The objects are written to a temporary file which then replaces
+        the file, so readers never see a partly written file.
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        with FILE_LOCK:
+            with LOCK:
+                objs = list(DATA[s_class].items())
+            objs_json = {}
+            for obj_id, obj in objs:
+                if type(obj) is dict:
+                    objs_json[obj_id] = obj
+                else:
+                    objs_json[obj_id] = obj.to_json(True)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+            unchanged = FILE_STATS.get(s_class) == cls.file_stats()
+            tmp_path = "{}.{}.{}.tmp".format(file_path, getpid(),
+                                             threading.get_ident())
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(objs_json, f)
+                replace(tmp_path, file_path)
+            except Exception:
+                # Do not leave a partly written file behind
+                try:
+                    remove(tmp_path)
+                except OSError:
+                    pass
+                raise
 
-    def save(self):
+            # The snapshot now holds every journaled change
+            journal_path = ".db_{}.journal".format(s_class)
+            if path.exists(journal_path):
+                remove(journal_path)
+            JOURNAL_SIZES[s_class] = 0
+            cls.track_own_write(unchanged)
+
+    def save(self, persist: bool = True):
         """ Save current object
+
+        With persist=False the change stays in memory until the next
+        save_to_file, to write many changes at once; hold FILE_LOCK from
+        the first change to the save_to_file so that a load does not
+        drop them.
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        with FILE_LOCK:
+            with LOCK:
+                DATA[s_class][self.id] = self
+                self.index()
+            if persist:
+                self.__class__.persist('save', self)
 
-    def remove(self):
+    def remove(self, persist: bool = True):
         """ Remove object
+
+        With persist=False the change stays in memory until the next
+        save_to_file, to write many changes at once; hold FILE_LOCK from
+        the first change to the save_to_file so that a load does not
+        drop them.
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        with FILE_LOCK:
+            with LOCK:
+                if DATA[s_class].get(self.id) is None:
+                    return
+                del DATA[s_class][self.id]
+                self.unindex()
+            if persist:
+                self.__class__.persist('remove', self)
 
     @classmethod
     def count(cls) -> int:
@@ -114,12 +588,29 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def page(cls, after: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID, starting after the
+        ID `after` (keyset pagination)
+        """
+        s_class = cls.__name__
+        with LOCK:
+            ids = SORTED_IDS.get(s_class)
+            if ids is None:
+                ids = sorted(DATA[s_class])
+                SORTED_IDS[s_class] = ids
+            start = 0
+            if after is not None:
+                start = bisect_right(ids, after)
+            return [cls.hydrate(obj_id)
+                    for obj_id in ids[start:start + limit]]
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return cls.hydrate(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
@@ -133,5 +624,21 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        # Only scan the objects of one index bucket when possible, and
+        # filter a snapshot of them taken under the lock
+        with LOCK:
+            ids = DATA[s_class].keys()
+            if s_class not in INDEXES:
+                cls.reindex()
+            for k, v in attributes.items():
+                index = INDEXES[s_class].get(k)
+                if index is not None:
+                    try:
+                        ids = index.lookup(v)
+                    except TypeError:
+                        continue
+                    break
+            objs = [cls.hydrate(obj_id) for obj_id in list(ids)]
+
+        return list(filter(_search, objs))
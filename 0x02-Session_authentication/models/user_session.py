@@ -11,6 +11,10 @@ class UserSession(Base):
     UserSession class representing sessions stored in the database
     """
 
+    __slots__ = ('user_id', 'session_id')
+
+    indexed_attributes = ('session_id',)
+
     def __init__(self, *args: list, **kwargs: dict):
         """
         Initializes a new UserSession instance.
@@ -20,5 +24,7 @@ class UserSession(Base):
             session_id (str): The session ID.
         """
         super().__init__(*args, **kwargs)
-        self.user_id = kwargs.get('user_id')
-        self.session_id = kwargs.get('session_id')
+        # Set without __setattr__, as in Base.__init__
+        set_slot = object.__setattr__
+        set_slot(self, 'user_id', kwargs.get('user_id'))
+        set_slot(self, 'session_id', kwargs.get('session_id'))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+""" Stress test of the model store with concurrent writers and readers
+
+Writer threads create users and remove some of them, while reader
+threads reload the class from file and search it. At the end, every
+change must be both in memory and on file.
+
+Usage: python3 stress_models.py [writers] [readers] [users per writer]
+Run it in each storage mode, e.g.:
+    python3 stress_models.py
+    MODEL_FLUSH_INTERVAL=0.01 python3 stress_models.py
+    MODEL_STORAGE=journal MODEL_JOURNAL_COMPACT=50 python3 stress_models.py
+The .db_ files are written to a temporary directory.
+"""
+import os
+import sys
+import tempfile
+import threading
+from models import base
+from models.user import User
+
+
+writers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+per_writer = int(sys.argv[3]) if len(sys.argv) > 3 else 150
+os.chdir(tempfile.mkdtemp())
+User.load_from_file()
+done = threading.Event()
+errors = []
+
+
+def write(n: int):
+    """ Create per_writer users, then remove every tenth of them
+    """
+    try:
+        users = []
+        for i in range(per_writer):
+            user = User(email="user{}-{}@hbtn.io".format(n, i))
+            user.save()
+            users.append(user)
+        for user in users[::10]:
+            user.remove()
+    except Exception as e:
+        errors.append(e)
+
+
+def read(n: int):
+    """ Reload and search the users until the writers are done
+    """
+    try:
+        while not done.is_set():
+            if n % 2 == 0:
+                User.load_from_file()
+            else:
+                User.reload_if_changed()
+            User.search({'email': "user0-0@hbtn.io"})
+            User.count()
+    except Exception as e:
+        errors.append(e)
+
+
+write_threads = [threading.Thread(target=write, args=(n,))
+                 for n in range(writers)]
+read_threads = [threading.Thread(target=read, args=(n,))
+                for n in range(readers)]
+for thread in write_threads + read_threads:
+    thread.start()
+for thread in write_threads:
+    thread.join()
+done.set()
+for thread in read_threads:
+    thread.join()
+base.flush()
+
+expected = {"user{}-{}@hbtn.io".format(n, i)
+            for n in range(writers) for i in range(per_writer) if i % 10 != 0}
+in_memory = {user.email for user in User.all()}
+User.load_from_file()
+on_file = {user.email for user in User.all()}
+
+print("mode: {}, flush interval: {}".format(base.STORAGE_MODE,
+                                            base.FLUSH_INTERVAL))
+print("expected users: {}".format(len(expected)))
+print("in memory: {}, on file: {}".format(len(in_memory), len(on_file)))
+print("errors: {}".format(errors))
+if in_memory != expected or on_file != expected or errors:
+    print("FAILED")
+    sys.exit(1)
+print("OK")
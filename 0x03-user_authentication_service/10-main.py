@@ -6,7 +6,7 @@ from auth import Auth
 
 email = 'bob@bob.com'
 password = 'MyPwdOfBob'
-auth = Auth()
+auth = Auth(reset=True)
 
 auth.register_user(email, password)
 
@@ -3,7 +3,7 @@ from auth import Auth
 
 email = 'bob@bob.com'
 password = 'MyPwdOfBob'
-auth = Auth()
+auth = Auth(reset=True)
 
 # Register a user
 auth.register_user(email, password)
@@ -10,7 +10,7 @@ from user import User
 
 
 def main():
-    auth = Auth()
+    auth = Auth(reset=True)
 
     # Test 1: Register a new user
     email = "testuser@example.com"
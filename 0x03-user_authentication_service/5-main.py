@@ -7,7 +7,7 @@ from auth import Auth
 email = 'me@me.com'
 password = 'mySecuredPwd'
 
-auth = Auth()
+auth = Auth(reset=True)
 
 try:
     user = auth.register_user(email, password)
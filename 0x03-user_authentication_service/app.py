@@ -11,6 +11,14 @@ app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.teardown_appcontext
+def close_db_session(exception=None) -> None:
+    """
+    Ends the database session of the request thread.
+    """
+    AUTH.close_session()
+
+
 @app.route('/', methods=['GET'], strict_slashes=False)
 def welcome():
     """
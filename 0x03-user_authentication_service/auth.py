@@ -4,27 +4,62 @@ Auth module
 """
 
 import bcrypt
+import os
 import uuid
+import warnings
 from db import DB
 from sqlalchemy.orm.exc import NoResultFound
+from typing import Union
 from user import User
 
+# bcrypt cost factor (log2 of the number of rounds) used for new hashes,
+# within the 4..31 range bcrypt accepts
+try:
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+except ValueError:
+    BCRYPT_ROUNDS = None
+if BCRYPT_ROUNDS is None or not 4 <= BCRYPT_ROUNDS <= 31:
+    warnings.warn("BCRYPT_ROUNDS must be an integer from 4 to 31, "
+                  "using 12")
+    BCRYPT_ROUNDS = 12
 
-def _hash_password(password: str) -> str:
+
+def _hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
     """
     Hashes a password using bcrypt
 
     Args:
         password (str): The password to hash.
+        rounds (int): The bcrypt cost factor, defaults to BCRYPT_ROUNDS.
 
     Returns:
       str: The hashed password.
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds)
     hashed = bcrypt.hashpw(password.encode(), salt)
     return hashed
 
 
+def _needs_rehash(hashed_password: Union[bytes, str],
+                  rounds: int = BCRYPT_ROUNDS) -> bool:
+    """
+    Checks whether a hashed password uses another cost factor.
+
+    Args:
+        hashed_password (bytes): A bcrypt hash such as b"$2b$12$...".
+        rounds (int): The expected cost factor, defaults to BCRYPT_ROUNDS.
+
+    Returns:
+        bool: True if the hash should be recomputed, False otherwise.
+    """
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode()
+    try:
+        return int(hashed_password.split('$')[2]) != rounds
+    except (IndexError, ValueError):
+        return True
+
+
 def _generate_uuid() -> str:
     """
     Generates a new UUID.
@@ -39,11 +74,24 @@ class Auth:
     """Auth class to interact with the authentication database.
     """
 
-    def __init__(self):
+    def __init__(self, reset: bool = False):
         """
         Initializes a new Auth instance
+
+        Args:
+            reset (bool): If True, start from an empty database (meant
+                          for tests).
         """
-        self._db = DB()
+        self._db = DB(reset=reset)
+
+    def close_session(self) -> None:
+        """
+        Ends the database session of the current thread.
+
+        Returns:
+            None
+        """
+        self._db.close_session()
 
     def register_user(self, email: str, password: str) -> User:
         """
@@ -72,6 +120,9 @@ class Auth:
         """
         Validates user login credentials.
 
+        On success, a password hashed with another cost factor than
+        BCRYPT_ROUNDS is rehashed and stored again.
+
         Args:
             email (str): The email of the user.
             password (str): The password of the user.
@@ -82,7 +133,12 @@ class Auth:
         try:
             user = self._db.find_user_by(email=email)
             hashed_password = user.hashed_password
-            return bcrypt.checkpw(password.encode(), hashed_password)
+            if not bcrypt.checkpw(password.encode(), hashed_password):
+                return False
+            if _needs_rehash(hashed_password):
+                self._db.update_user(user.id,
+                                     hashed_password=_hash_password(password))
+            return True
         except NoResultFound:
             return False
 
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark of user lookups with and without the users table indexes
+
+Times a lookup on email, session_id and reset_token as plain SQL, once
+through the index and once forced to scan the table with SQLite's NOT
+INDEXED, and through DB.find_user_by, ORM overhead included.
+
+Usage: python3 bench_lookup.py [users ...]
+The database is in memory.
+"""
+import sys
+import timeit
+from sqlalchemy import text
+from db import DB, MEMORY_URL
+from user import User
+
+
+sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+formats = {'email': "user{}@hbtn.io", 'session_id': "session-{}",
+           'reset_token': "token-{}"}
+
+print("{:>8} {:>12} {:>11} {:>11} {:>9} {:>18}".format(
+    "users", "column", "scan (us)", "index (us)", "speedup",
+    "find_user_by (us)"))
+for size in sizes:
+    db = DB(MEMORY_URL, reset=True)
+    with db._engine.begin() as connection:
+        for start in range(0, size, 10000):
+            connection.execute(User.__table__.insert(), [
+                dict({column: value.format(i)
+                      for column, value in formats.items()},
+                     hashed_password="hashed")
+                for i in range(start, min(size, start + 10000))
+            ])
+
+    for column, value in formats.items():
+        value = value.format(size // 2)
+        query = "SELECT id FROM users {} WHERE {} = :value"
+        scan_query = text(query.format("NOT INDEXED", column))
+        index_query = text(query.format("", column))
+
+        def select(query):
+            with db._engine.connect() as connection:
+                return connection.execute(query, {'value': value}).scalar()
+
+        def find():
+            return db.find_user_by(**{column: value}).id
+
+        assert select(scan_query) == select(index_query) == find()
+        number = max(1, 100000 // size)
+        scan_time = min(timeit.repeat(lambda: select(scan_query),
+                                      number=number, repeat=3)) / number
+        index_time = min(timeit.repeat(lambda: select(index_query),
+                                       number=1000, repeat=3)) / 1000
+        find_time = min(timeit.repeat(find, number=1000, repeat=3)) / 1000
+        print("{:>8} {:>12} {:>11.1f} {:>11.1f} {:>8.0f}x {:>18.1f}".format(
+            size, column, scan_time * 1e6, index_time * 1e6,
+            scan_time / index_time, find_time * 1e6))
+    db.close_session()
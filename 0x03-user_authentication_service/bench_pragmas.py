@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the SQLite profiles of the DB class
+
+Times user inserts, lookups and updates, one commit each, with the
+SQLite defaults, the SQLITE_PRAGMAS profile (WAL, synchronous=NORMAL),
+WAL with synchronous=FULL, and the shared in-memory database. The same
+mix then runs from 4 threads at once: the last columns give its
+operations per second and the mean and 95th percentile latency of its
+lookups, i.e. reads under concurrent writes.
+
+Usage: python3 bench_pragmas.py [operations]
+The database files are written to a temporary directory.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from db import DB, MEMORY_URL, SQLITE_PRAGMAS
+
+
+def run(db: DB, prefix: str, count: int) -> tuple:
+    """ Return the inserts, lookups and updates per second of count users,
+    and the latency of each lookup
+    """
+    emails = ["{}-{}@hbtn.io".format(prefix, i) for i in range(count)]
+    rates = []
+    latencies = []
+    start = time.perf_counter()
+    users = [db.add_user(email, "hashed") for email in emails]
+    rates.append(count / (time.perf_counter() - start))
+    start = time.perf_counter()
+    for email in emails:
+        begin = time.perf_counter()
+        db.find_user_by(email=email)
+        latencies.append(time.perf_counter() - begin)
+    rates.append(count / (time.perf_counter() - start))
+    start = time.perf_counter()
+    for user in users:
+        db.update_user(user.id, session_id="{}-session".format(user.id))
+    rates.append(count / (time.perf_counter() - start))
+    db.close_session()
+    return tuple(rates), latencies
+
+
+def run_threads(db: DB, count: int, threads: int = 4) -> tuple:
+    """ Run the mix from several threads at once, and return the
+    operations per second, the lookup latencies and the errors raised
+    """
+    latencies = []
+    errors = []
+
+    def work(n: int):
+        """ Run the mix in one thread and record its results
+        """
+        try:
+            latencies.extend(run(db, "thread{}".format(n), count)[1])
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=work, args=(n,))
+               for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (3 * count * threads / (time.perf_counter() - start),
+            latencies, errors)
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+directory = tempfile.mkdtemp()
+profiles = (
+    ("SQLite defaults", None, {}),
+    ("WAL, NORMAL", None, SQLITE_PRAGMAS),
+    ("WAL, FULL", None, dict(SQLITE_PRAGMAS, synchronous='FULL')),
+    ("in memory", MEMORY_URL, SQLITE_PRAGMAS),
+)
+failed = False
+
+print("{:>16} {:>9} {:>9} {:>9} {:>14} {:>16} {:>15}".format(
+    "profile", "insert/s", "lookup/s", "update/s", "4 threads op/s",
+    "lookup mean (ms)", "lookup p95 (ms)"))
+for i, (name, url, pragmas) in enumerate(profiles):
+    if url is None:
+        url = "sqlite:///{}".format(os.path.join(directory,
+                                                 "bench{}.db".format(i)))
+    db = DB(url, reset=True, pragmas=pragmas)
+    rates = run(db, "single", count)[0]
+    mixed, latencies, errors = run_threads(db, count // 4)
+    if errors:
+        failed = True
+        print("{:>16} {:>9.0f} {:>9.0f} {:>9.0f} {:>14} {}".format(
+            name, *rates, "failed", "{} thread(s): {!r}".format(
+                len(errors), errors[0])))
+        continue
+    print("{:>16} {:>9.0f} {:>9.0f} {:>9.0f} {:>14.0f} {:>16.2f} "
+          "{:>15.2f}".format(
+              name, *rates, mixed, statistics.mean(latencies) * 1e3,
+              statistics.quantiles(latencies, n=20)[-1] * 1e3))
+if failed:
+    sys.exit(1)
@@ -1,36 +1,200 @@
 #!/usr/bin/env python3
 """DB module
 """
-from sqlalchemy import create_engine
+import os
+import threading
+from contextlib import nullcontext
+from sqlalchemy import (Column, Integer, Table, create_engine, event,
+                        inspect)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.orm.exc import NoResultFound
 
 from user import Base, User
 
 
+# Version of the schema defined by the models, stored in the database
+SCHEMA_VERSION = 1
+
+schema_version = Table('schema_version', Base.metadata,
+                       Column('version', Integer, nullable=False))
+
+# Columns of the users table that update_user may set
+USER_COLUMNS = frozenset(User.__table__.columns.keys())
+
+# Database URL of a single in-memory SQLite database shared by all threads
+MEMORY_URL = 'sqlite://'
+
+# PRAGMA statements run on every new SQLite connection: WAL lets readers
+# and a writer work at the same time, NORMAL sync skips the fsync of most
+# commits, and writers wait busy_timeout ms for a lock instead of failing
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('DB_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('DB_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': os.getenv('DB_BUSY_TIMEOUT', '5000'),
+    'cache_size': os.getenv('DB_CACHE_SIZE', '-20000'),
+    'mmap_size': os.getenv('DB_MMAP_SIZE', '268435456'),
+}
+
+# Values accepted for each supported PRAGMA, int for the numeric ones; the
+# values are put in the PRAGMA statements as is, so nothing else is
+PRAGMA_VALUES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'busy_timeout': int,
+    'cache_size': int,
+    'mmap_size': int,
+}
+
+
 class DB:
     """DB class
     """
 
-    def __init__(self) -> None:
+    def __init__(self, url: str = None, reset: bool = False,
+                 pragmas: dict = None, **engine_options) -> None:
         """Initialize a new DB instance
+
+        Args:
+            url (str): The database URL, defaults to the DB_URL environment
+                       variable or sqlite:///a.db. MEMORY_URL opens an
+                       in-memory database shared by all threads.
+            reset (bool): If True, drop and recreate all tables, deleting
+                          all data (meant for tests).
+            pragmas (dict): PRAGMA settings for SQLite connections,
+                            defaults to SQLITE_PRAGMAS; {} keeps the
+                            SQLite defaults. Only the PRAGMAs and values
+                            of PRAGMA_VALUES are accepted.
+            **engine_options: Extra keyword arguments for create_engine.
+
+        Each thread gets its own session from a scoped_session, and
+        connections come from a pool of DB_POOL_SIZE (default 5) plus
+        DB_POOL_OVERFLOW (default 10) connections. An in-memory database
+        has a single connection, used by one thread at a time.
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+        if url is None:
+            url = os.getenv('DB_URL', 'sqlite:///a.db')
+        if pragmas is None:
+            pragmas = SQLITE_PRAGMAS
+        pragmas = self._check_pragmas(pragmas)
+        engine_options.setdefault('echo', False)
+        # Calls on the shared connection of StaticPool are serialized
+        self._lock = nullcontext()
+        if url in (MEMORY_URL, 'sqlite:///:memory:'):
+            # Every pooled connection would open its own empty database
+            engine_options.setdefault('poolclass', StaticPool)
+        if engine_options.get('poolclass') is StaticPool:
+            # All threads share one connection, so the transactions of
+            # their sessions must not interleave, and a session dropped
+            # by its thread must not roll back the one of another thread
+            self._lock = threading.RLock()
+            engine_options.setdefault('pool_reset_on_return', None)
+        if 'poolclass' not in engine_options:
+            engine_options['poolclass'] = QueuePool
+            engine_options.setdefault(
+                'pool_size', int(os.getenv('DB_POOL_SIZE', '5')))
+            engine_options.setdefault(
+                'max_overflow', int(os.getenv('DB_POOL_OVERFLOW', '10')))
+        if url.startswith('sqlite'):
+            # Pooled connections are handed to different threads
+            connect_args = engine_options.setdefault('connect_args', {})
+            connect_args.setdefault('check_same_thread', False)
+        self._engine = create_engine(url, **engine_options)
+        if url.startswith('sqlite') and len(pragmas) > 0:
+            event.listen(self._engine, 'connect',
+                         lambda dbapi_connection, connection_record:
+                         self._set_pragmas(dbapi_connection, pragmas))
+        if reset:
+            Base.metadata.drop_all(self._engine)
+        # Only the missing tables and indexes are created; create_all
+        # does not add new indexes to an existing table
         Base.metadata.create_all(self._engine)
-        self.__session = None
+        existing = {index['name']
+                    for index in inspect(self._engine).get_indexes('users')}
+        for index in User.__table__.indexes:
+            if index.name not in existing:
+                index.create(bind=self._engine)
+        self._check_schema_version()
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
+
+    @staticmethod
+    def _check_pragmas(pragmas: dict) -> dict:
+        """Checks PRAGMA settings against PRAGMA_VALUES
+
+        Args:
+            pragmas (dict): PRAGMA names and values.
+
+        Returns:
+            dict: The PRAGMA names and their values as ints or
+                  upper-case keywords.
+
+        Raises:
+            ValueError: If a PRAGMA or one of its values is not supported.
+        """
+        checked = {}
+        for name, value in pragmas.items():
+            allowed = PRAGMA_VALUES.get(name)
+            if allowed is None:
+                raise ValueError(f"Unsupported PRAGMA {name}")
+            try:
+                if allowed is int:
+                    value = int(value)
+                else:
+                    value = str(value).upper()
+                    if value not in allowed:
+                        raise ValueError
+            except ValueError:
+                raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+            checked[name] = value
+        return checked
+
+    @staticmethod
+    def _set_pragmas(dbapi_connection, pragmas: dict) -> None:
+        """Runs PRAGMA statements on a new SQLite connection
+
+        Args:
+            dbapi_connection: The sqlite3 connection.
+            pragmas (dict): PRAGMA names and values.
+        """
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    def _check_schema_version(self) -> None:
+        """Records the schema version in a new database, and checks the
+        version of an existing one
+
+        Raises:
+            ValueError: If the database was created by a newer schema.
+        """
+        with self._engine.begin() as connection:
+            row = connection.execute(schema_version.select()).first()
+            if row is None:
+                connection.execute(
+                    schema_version.insert().values(version=SCHEMA_VERSION)
+                )
+            elif row.version > SCHEMA_VERSION:
+                raise ValueError(
+                    f"Database schema version {row.version} is newer "
+                    f"than {SCHEMA_VERSION}"
+                )
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session object of the current thread
+        """
+        return self.__session()
+
+    def close_session(self) -> None:
+        """Closes the session of the current thread and returns its
+        connection to the pool, e.g. at the end of a request
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        with self._lock:
+            self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """
@@ -42,10 +206,19 @@ class DB:
 
         Returns:
             User: The created user object.
+
+        Raises:
+            ValueError: If a user with the same email already exists.
         """
         user = User(email=email, hashed_password=hashed_password)
-        self._session.add(user)
-        self._session.commit()
+        with self._lock:
+            self._session.add(user)
+            try:
+                self._session.commit()
+            except IntegrityError:
+                # Leave the session usable for the next queries
+                self._session.rollback()
+                raise ValueError(f"User {email} already exists")
         return user
 
     def find_user_by(self, **kwargs) -> User:
@@ -63,7 +236,8 @@ class DB:
             InvalidRequestError: If the query arguments are invalid.
         """
         try:
-            user = self._session.query(User).filter_by(**kwargs).one()
+            with self._lock:
+                user = self._session.query(User).filter_by(**kwargs).one()
         except NoResultFound:
             raise NoResultFound
         except (InvalidRequestError, TypeError):
@@ -73,9 +247,10 @@ class DB:
             raise NoResultFound
         return user
 
-    def update_user(self, user_id: int, **kwargs) -> None:
+    def update_user(self, user_id: int, **kwargs) -> int:
         """
-        Updates a user's attributes.
+        Updates a user's attributes with a single UPDATE statement,
+        without loading the user first.
 
         Args:
             user_id (int): The ID of the user to update.
@@ -83,16 +258,25 @@ class DB:
                       user's attributes to update.
 
         Returns:
-            None
+            int: The number of updated rows.
 
         Raises:
             ValueError: If an argument does not
                         correspond to a user attribute.
+            NoResultFound: If no user has this ID.
         """
-        user = self.find_user_by(id=user_id)
-        for key, value in kwargs.items():
-            if not hasattr(user, key):
+        for key in kwargs:
+            if key not in USER_COLUMNS:
                 raise ValueError
-            setattr(user, key, value)
+        if len(kwargs) == 0:
+            self.find_user_by(id=user_id)
+            return 1
 
-        self._session.commit()
+        with self._lock:
+            count = self._session.query(User).filter_by(id=user_id).update(
+                kwargs, synchronize_session='evaluate'
+            )
+            self._session.commit()
+        if count == 0:
+            raise NoResultFound
+        return count
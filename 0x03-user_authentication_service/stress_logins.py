@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Stress test of parallel logins against a SQLite database file
+
+Each thread registers its own users through the Flask app, then logs
+them in, reads their profile and logs them out, over and over. Some
+threads also register the same email at the same time. Every request
+must get the expected status code, and every session must be closed
+at the end.
+
+Usage: python3 stress_logins.py [threads] [logins per thread]
+The database is written to a temporary directory unless DB_URL is set
+(e.g. DB_URL=sqlite:// for the in-memory database), and BCRYPT_ROUNDS
+defaults to 4 to keep the test short.
+"""
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+os.environ.setdefault('DB_URL', "sqlite:///{}".format(
+    os.path.join(tempfile.mkdtemp(), 'stress.db')))
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+from app import app, AUTH  # noqa: E402
+from user import User  # noqa: E402
+
+
+threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+logins = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+statuses = Counter()
+failures = []
+start = threading.Barrier(threads)
+
+
+def check(name: str, response, expected: int):
+    """ Record the status code of a response and any unexpected one
+    """
+    statuses[(name, response.status_code)] += 1
+    if response.status_code != expected:
+        failures.append((name, response.status_code,
+                         response.get_data(as_text=True)[:200]))
+
+
+def run(n: int):
+    """ Register users, then log them in and out logins times
+    """
+    client = app.test_client()
+    start.wait()
+    # Every thread registers the same shared email at the same time
+    response = client.post('/users', data={'email': "shared@hbtn.io",
+                                           'password': "pwd"})
+    statuses[('shared register', response.status_code)] += 1
+    if response.status_code not in (200, 400):
+        failures.append(('shared register', response.status_code,
+                         response.get_data(as_text=True)[:200]))
+    emails = ["user{}-{}@hbtn.io".format(n, i) for i in range(5)]
+    for email in emails:
+        check('register', client.post('/users', data={
+            'email': email, 'password': "pwd"}), 200)
+    for i in range(logins):
+        email = emails[i % len(emails)]
+        check('login', client.post('/sessions', data={
+            'email': email, 'password': "pwd"}), 200)
+        check('profile', client.get('/profile'), 200)
+        check('logout', client.delete('/sessions'), 302)
+    check('bad login', client.post('/sessions', data={
+        'email': emails[0], 'password': "wrong"}), 401)
+
+
+workers = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+
+users = AUTH._db._session.query(User).count()
+open_sessions = AUTH._db._session.query(User).filter(
+    User.session_id.isnot(None)).count()
+AUTH.close_session()
+shared = statuses[('shared register', 200)]
+
+for (name, status), count in sorted(statuses.items()):
+    print("{:>16} {}: {}".format(name, status, count))
+print("users: {} (expected {}), open sessions: {}, shared email "
+      "registered {} time(s)".format(users, threads * 5 + 1,
+                                     open_sessions, shared))
+print("pool: {}".format(AUTH._db._engine.pool.status()))
+if failures:
+    print("failures: {}".format(failures[:5]))
+if failures or users != threads * 5 + 1 or open_sessions or shared != 1:
+    print("FAILED")
+    sys.exit(1)
+print("OK")
@@ -16,17 +16,18 @@ class User(Base):
 
     Attributes:
         id (int): The primary key for the user.
-        email (str): The email address of the user. Non-nullable.
+        email (str): The email address of the user. Non-nullable, unique
+                     and indexed.
         hashed_password (str): The hashed password of the user. Non-nullable.
         session_id (str): The session ID for the user's current session.
-                          Nullable.
+                          Nullable, unique and indexed.
         reset_token (str): The token used for resetting the user's password.
-                           Nullable.
+                           Nullable and indexed.
     """
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True)
-    email = Column(String(250), nullable=False)
+    email = Column(String(250), nullable=False, unique=True, index=True)
     hashed_password = Column(String(250), nullable=False)
-    session_id = Column(String(250), nullable=True)
-    reset_token = Column(String(250), nullable=True)
+    session_id = Column(String(250), nullable=True, unique=True, index=True)
+    reset_token = Column(String(250), nullable=True, index=True)